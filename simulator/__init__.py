@@ -5,9 +5,15 @@ Provides Python robot harness for the C++ SDL rendering client.
 
 Components:
 - vex_stub: VEX IQ API stubs for running robot code
+- runtime: Installs the stubs as the "vex" module and compiles robot code
 - iqpython_parser: Parser for .iqpython project files
 - ipc_bridge: IPC bridge between C++ client and Python harness
 """
 
 from .vex_stub import *
-from .iqpython_parser import parse_iqpython, describe_robot, RobotConfig
+# Simulator-side names kept out of vex_stub.__all__ (robot code must not see them)
+from .vex_stub import (
+    BrainScreen, BrainTimer, ControllerAxis, ControllerButton,
+    CallbackRegistry, reset_all,
+)
+from .iqpython_parser import parse_iqpython, parse_iqpython_data, describe_robot, RobotConfig
@@ -25,8 +25,7 @@ import sys
 import os
 import json
 import threading
-import time
-import select
+import queue
 from pathlib import Path
 
 # Add simulator directory to path
@@ -34,6 +33,30 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from iqpython_parser import parse_iqpython, describe_robot, RobotConfig
 import vex_stub
+import runtime
+
+# Gamepad message button keys, in the order Controller.apply_gamepad expects
+GAMEPAD_BUTTON_KEYS = ("LUp", "LDown", "RUp", "RDown", "EUp", "EDown", "FUp", "FDown")
+# Gamepad message axis keys, in the order Controller.apply_gamepad expects
+GAMEPAD_AXIS_KEYS = ("A", "B", "C", "D")
+
+# orjson is optional: simulator/ must keep working on the standard library alone
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def _dumps(msg: dict) -> bytes:
+        return orjson.dumps(msg)
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    _loads = orjson.loads
+else:
+    def _dumps(msg: dict) -> bytes:
+        return json.dumps(msg, separators=(',', ':')).encode()
+
+    _loads = json.loads
 
 
 class IPCBridge:
@@ -45,12 +68,32 @@ class IPCBridge:
         self._running = False
         self._robot_thread = None
         self._controller: vex_stub.Controller = None
+        self._out = sys.stdout.buffer
+        self._pending_gamepad: dict = None
+        self._robot_ready = threading.Event()
+        self._inbox: queue.Queue = queue.Queue()
+
+        # Tick payload is built once and mutated in place every tick.
+        # Port keys are stored pre-stringified (JSON object keys are strings);
+        # the *_by_port dicts index the same leaf dicts by integer port.
+        self._motor_payloads: dict[str, dict] = {}
+        self._pneumatic_payloads: dict[str, dict] = {}
+        self._motor_payload_by_port: dict[int, dict] = {}
+        self._pneumatic_payload_by_port: dict[int, dict] = {}
+        self._last_motor_states: dict[int, tuple] = {}
+        self._last_pneumatic_states: dict[int, tuple] = {}
+        self._tick_msg = {
+            "type": "state",
+            "motors": self._motor_payloads,
+            "pneumatics": self._pneumatic_payloads,
+        }
 
     def send_message(self, msg: dict):
         """Send a JSON message to C++ via stdout."""
         try:
-            json_str = json.dumps(msg, separators=(',', ':'))
-            print(json_str, flush=True)
+            # One write per message keeps lines whole when both threads send
+            self._out.write(_dumps(msg) + b"\n")
+            self._out.flush()
         except Exception as e:
             self.log_error(f"Failed to send message: {e}")
 
@@ -79,61 +122,107 @@ class IPCBridge:
         })
 
     def handle_gamepad(self, data: dict):
-        """Handle gamepad input from C++."""
+        """Handle gamepad input from C++.
+
+        Only the latest snapshot is kept; it is applied on the next tick so
+        bursts of gamepad messages cost one controller update per tick.
+        """
+        self._pending_gamepad = data
+
+    def apply_gamepad(self, data: dict):
+        """Apply a gamepad snapshot to the robot's controller."""
         if not self._controller:
             return
 
-        # Update controller axes (A, B, C, D) via ControllerAxis objects
         axes = data.get("axes", {})
-        self._controller.axisA.set_position(int(axes.get("A", 0)))
-        self._controller.axisB.set_position(int(axes.get("B", 0)))
-        self._controller.axisC.set_position(int(axes.get("C", 0)))
-        self._controller.axisD.set_position(int(axes.get("D", 0)))
-
-        # Update controller buttons via ControllerButton objects
         buttons = data.get("buttons", {})
-        self._controller.buttonLUp.set_pressed(buttons.get("LUp", False))
-        self._controller.buttonLDown.set_pressed(buttons.get("LDown", False))
-        self._controller.buttonRUp.set_pressed(buttons.get("RUp", False))
-        self._controller.buttonRDown.set_pressed(buttons.get("RDown", False))
-        self._controller.buttonEUp.set_pressed(buttons.get("EUp", False))
-        self._controller.buttonEDown.set_pressed(buttons.get("EDown", False))
-        self._controller.buttonFUp.set_pressed(buttons.get("FUp", False))
-        self._controller.buttonFDown.set_pressed(buttons.get("FDown", False))
+        self._controller.apply_gamepad(
+            tuple([int(axes.get(key, 0)) for key in GAMEPAD_AXIS_KEYS]),
+            tuple([buttons.get(key, False) for key in GAMEPAD_BUTTON_KEYS]),
+        )
 
     def handle_tick(self, data: dict):
         """Handle tick - send motor/pneumatic state back to C++."""
+        if self._pending_gamepad is not None:
+            self.apply_gamepad(self._pending_gamepad)
+            self._pending_gamepad = None
+
+        # Finish timed commands that are due (e.g. non-blocking spin_for)
+        vex_stub.Scheduler.run_due()
+
+        # Only devices the robot code touched since the last tick are read;
+        # the client keeps the last state it received, so a tick where
+        # nothing changed needs no message at all
+        changed = False
+
         # Collect motor states
         # Use wheel_velocity (logical wheel direction) not actual_velocity (physical motor direction)
         # The 'reversed' flag on motors compensates for physical mounting, but drivetrain
         # physics needs the logical wheel direction
-        motors = {}
-        for port, motor in vex_stub.Motor.get_all_instances().items():
-            motors[port] = {
-                "speed": motor.wheel_velocity,
-                "spinning": motor._spinning,
-                "position": motor._position,
-            }
+        motor_payloads = self._motor_payloads
+        motor_payload_by_port = self._motor_payload_by_port
+        last_motor_states = self._last_motor_states
+        for port in vex_stub.Motor.take_dirty_ports():
+            motor = vex_stub.Motor.get_instance(port)
+            if motor is None:
+                continue
+            state = (motor._wheel_velocity, motor._spinning, motor._position)
+            if last_motor_states.get(port) == state:
+                continue
+            last_motor_states[port] = state
+            payload = motor_payload_by_port.get(port)
+            if payload is None:
+                payload = motor_payload_by_port[port] = motor_payloads[str(port)] = {}
+            payload["speed"], payload["spinning"], payload["position"] = state
+            changed = True
 
         # Collect pneumatic states
-        pneumatics = {}
-        for port, pneu in vex_stub.Pneumatic.get_all_instances().items():
-            pneumatics[port] = {
-                "extended": pneu._extended,
-                "pump": pneu._pump_on,
-            }
-
-        # Send state update
-        self.send_message({
-            "type": "state",
-            "motors": motors,
-            "pneumatics": pneumatics,
-        })
+        pneumatic_payloads = self._pneumatic_payloads
+        pneumatic_payload_by_port = self._pneumatic_payload_by_port
+        last_pneumatic_states = self._last_pneumatic_states
+        for port in vex_stub.Pneumatic.take_dirty_ports():
+            pneu = vex_stub.Pneumatic.get_instance(port)
+            if pneu is None:
+                continue
+            state = (pneu._extended, pneu._pump_on)
+            if last_pneumatic_states.get(port) == state:
+                continue
+            last_pneumatic_states[port] = state
+            payload = pneumatic_payload_by_port.get(port)
+            if payload is None:
+                payload = pneumatic_payload_by_port[port] = pneumatic_payloads[str(port)] = {}
+            payload["extended"], payload["pump"] = state
+            changed = True
+
+        # Send the full state (the client replaces its copy on every message)
+        if changed:
+            self.send_message(self._tick_msg)
+
+    def stop(self):
+        """Stop the main loop (safe to call from any thread).
+
+        The main loop blocks on the inbox, so a None entry is posted to wake
+        it immediately rather than waiting for the next stdin message.
+        """
+        self._running = False
+        self._inbox.put(None)
+
+    def _stdin_reader(self):
+        """Forward stdin lines to the main loop (runs on a daemon thread).
+
+        A blocking readline lets the main loop sleep until a message
+        arrives instead of polling stdin. EOF is forwarded as "".
+        """
+        while True:
+            line = sys.stdin.readline()
+            self._inbox.put(line)
+            if not line:
+                return
 
     def process_message(self, line: str):
         """Process a JSON message from C++."""
         try:
-            msg = json.loads(line)
+            msg = _loads(line)
             msg_type = msg.get("type", "")
 
             if msg_type == "gamepad":
@@ -141,7 +230,7 @@ class IPCBridge:
             elif msg_type == "tick":
                 self.handle_tick(msg)
             elif msg_type == "shutdown":
-                self._running = False
+                self.stop()
             else:
                 self.log_error(f"Unknown message type: {msg_type}")
 
@@ -152,31 +241,21 @@ class IPCBridge:
 
     def execute_robot_code(self):
         """Execute the robot code from the .iqpython file."""
-        # Reset all stub state
-        vex_stub.reset_all()
-
-        # Create a namespace for the robot code
-        robot_globals = {
-            '__name__': '__main__',
-            '__file__': str(self.iqpython_path),
-        }
-
-        # Inject vex stub module as 'vex'
-        sys.modules['vex'] = vex_stub
-
-        # Inject urandom as a module (MicroPython compatibility)
-        sys.modules['urandom'] = vex_stub.urandom
-
         try:
-            # Pre-create the controller
-            self._controller = vex_stub.Controller()
+            # Reset stub state, install the vex module and pre-create the controller
+            robot_globals, self._controller = runtime.prepare_runtime(self.iqpython_path)
+            self._robot_ready.set()
             self.send_message({"type": "status", "message": "Robot code starting"})
             self.log_info("Robot code started")
 
+            # The filename makes tracebacks point at the .iqpython file
+            code = runtime.compile_robot_code(self.config.python_code, str(self.iqpython_path))
+
             # Execute the robot code (may block forever with while True loop)
-            exec(self.config.python_code, robot_globals)
+            exec(code, robot_globals)
 
         except Exception as e:
+            self._robot_ready.set()
             self.log_error(f"Robot code error: {e}")
             self.send_message({"type": "error", "message": str(e)})
             import traceback
@@ -186,32 +265,36 @@ class IPCBridge:
         """Main run loop."""
         self.load()
 
+        # Protocol messages go straight to the stdout buffer; route everything
+        # else printed while running (robot code, stub logging) to stderr so it
+        # cannot interleave with them on the IPC pipe
+        saved_stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            self._run_loop()
+        finally:
+            sys.stdout = saved_stdout
+
+    def _run_loop(self):
+        """Start the robot code and process messages until shutdown."""
         # Start robot code in a separate thread
         self._running = True
         self._robot_thread = threading.Thread(target=self.execute_robot_code, daemon=True)
         self._robot_thread.start()
 
-        # Give robot code a moment to initialize
-        time.sleep(0.2)
+        # Wait until the robot thread has created the controller
+        self._robot_ready.wait(timeout=5.0)
 
-        # Main loop - read stdin for messages
+        # Main loop - block until the reader thread hands over a message
+        threading.Thread(target=self._stdin_reader, daemon=True).start()
         while self._running:
             try:
-                # Non-blocking read with timeout
-                if sys.platform == 'win32':
-                    # Windows: use a simple blocking read with timeout via thread
-                    line = sys.stdin.readline()
-                    if not line:
-                        break
-                    self.process_message(line.strip())
-                else:
-                    # Unix: use select for non-blocking
-                    ready, _, _ = select.select([sys.stdin], [], [], 0.01)
-                    if ready:
-                        line = sys.stdin.readline()
-                        if not line:
-                            break
-                        self.process_message(line.strip())
+                line = self._inbox.get()
+                if line is None:
+                    continue
+                if not line:
+                    break
+                self.process_message(line.strip())
 
             except KeyboardInterrupt:
                 break
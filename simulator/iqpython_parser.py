@@ -4,11 +4,28 @@ IQPython Parser
 Parses .iqpython files to extract robot configuration and code.
 """
 
+import copy
+import io
 import json
+import re
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 from pathlib import Path
 
+# orjson is optional; the stdlib parser is used when it isn't installed
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Leading number of a value with a unit suffix, e.g. "200mm"
+_NUMBER_RE = re.compile(r'[\d.]+')
+
+# Text after the last "Project:" on the first line mentioning it (header comment)
+_PROJECT_RE = re.compile(r'.*Project:(.*)')
+
 
 @dataclass
 class MotorConfig:
@@ -84,114 +101,159 @@ def parse_iqpython(file_path: str | Path) -> RobotConfig:
         RobotConfig with all extracted configuration
     """
     file_path = Path(file_path)
+    st = file_path.stat()
+
+    # Cached per file version; callers get their own copy since RobotConfig is mutable
+    config = _parse_iqpython_cached(str(file_path.resolve()), st.st_mtime_ns, st.st_size)
+    return copy.deepcopy(config)
+
 
-    with open(file_path, 'r') as f:
-        data = json.load(f)
+@lru_cache(maxsize=32)
+def _parse_iqpython_cached(path: str, mtime_ns: int, size: int) -> RobotConfig:
+    """Parse a file; mtime_ns and size are only part of the cache key."""
+    return parse_iqpython_data(_loads(Path(path).read_bytes()))
+
+
+@dataclass
+class _ParseState:
+    """Devices collected while walking robotConfig."""
+    motors: list[MotorConfig]
+    motor_groups: list[MotorGroupConfig]
+    pneumatics: list[PneumaticConfig]
+    drivetrain: Optional[DrivetrainConfig] = None
+    controller: Optional[ControllerConfig] = None
+
+
+def _parse_motor(device: dict, state: _ParseState):
+    """Individual motor."""
+    ports = device.get("port", [])
+    if ports:
+        state.motors.append(MotorConfig(
+            port=ports[0],
+            name=device.get("name", "unknown"),
+            reversed=device.get("setting", {}).get("reversed", "false") == "true"
+        ))
+
+
+def _parse_drivetrain(device: dict, state: _ParseState):
+    """Drivetrain (includes motors)."""
+    ports = device.get("port", [])
+    settings = device.get("setting", {})
+
+    # Ports format: [left_port, right_port, gyro_port] for 2-motor
+    # or [left1, left2, right1, right2, gyro_port] for 4-motor
+    drive_type = settings.get("type", "2-motor")
+
+    if drive_type == "2-motor" and len(ports) >= 2:
+        left_ports = [ports[0]]
+        right_ports = [ports[1]]
+    elif drive_type == "4-motor" and len(ports) >= 4:
+        left_ports = [ports[0], ports[1]]
+        right_ports = [ports[2], ports[3]]
+    else:
+        left_ports = [ports[0]] if ports else [1]
+        right_ports = [ports[1]] if len(ports) > 1 else [2]
+
+    # Parse wheel size (e.g., "200mm" -> 200)
+    wheel_size_str = settings.get("wheelSize", "200mm")
+    m = _NUMBER_RE.search(wheel_size_str)
+    wheel_size = float(m.group()) if m else 200.0
+
+    # Parse gear ratio (e.g., "1:1" -> 1.0, "2:1" -> 2.0)
+    gear_ratio_str = settings.get("gearRatio", "1:1")
+    if ":" in gear_ratio_str:
+        parts = gear_ratio_str.split(":")
+        try:
+            gear_ratio = float(parts[0]) / float(parts[1])
+        except:
+            gear_ratio = 1.0
+    else:
+        gear_ratio = 1.0
+
+    state.drivetrain = DrivetrainConfig(
+        left_ports=left_ports,
+        right_ports=right_ports,
+        name=device.get("name", "unknown"),
+        wheel_size=wheel_size,
+        track_width=float(settings.get("width", 173)),
+        wheelbase=float(settings.get("wheelbase", 76)),
+        gear_ratio=gear_ratio,
+        drive_type=drive_type
+    )
+
+
+def _parse_controller(device: dict, state: _ParseState):
+    """Controller."""
+    state.controller = ControllerConfig(
+        name=device.get("name", "unknown"),
+        drive_mode=device.get("setting", {}).get("drive", "split")
+    )
 
+
+def _parse_motor_group(device: dict, state: _ParseState):
+    """Motor group - multiple motors working together."""
+    state.motor_groups.append(MotorGroupConfig(
+        ports=device.get("port", []),
+        name=device.get("name", "unknown"),
+        motor_b_reversed=device.get("setting", {}).get("motor_b_reversed", "false") == "true"
+    ))
+
+
+def _parse_pneumatic(device: dict, state: _ParseState):
+    """Pneumatic cylinder."""
+    ports = device.get("port", [])
+    if ports:
+        state.pneumatics.append(PneumaticConfig(
+            port=ports[0],
+            name=device.get("name", "unknown")
+        ))
+
+
+# deviceType -> handler; unknown device types are ignored
+_DEVICE_HANDLERS = {
+    "Motor": _parse_motor,
+    "Drivetrain": _parse_drivetrain,
+    "Controller": _parse_controller,
+    "MotorGroup": _parse_motor_group,
+    "Pneumatic": _parse_pneumatic,
+}
+
+
+def parse_iqpython_data(data: dict) -> RobotConfig:
+    """
+    Build a robot configuration from already-decoded .iqpython JSON.
+
+    Lets callers that have the decoded project (e.g. to read textContent)
+    reuse it instead of parsing the file a second time.
+
+    Args:
+        data: Decoded .iqpython JSON object
+
+    Returns:
+        RobotConfig with all extracted configuration
+    """
     # Extract basic info
     python_code = data.get("textContent", "")
     brain_gen = data.get("targetBrainGen", "Second")
     robot_config = data.get("robotConfig", [])
 
     # Parse devices
-    motors: list[MotorConfig] = []
-    drivetrain: Optional[DrivetrainConfig] = None
-    controller: Optional[ControllerConfig] = None
-    motor_groups: list[MotorGroupConfig] = []
-    pneumatics: list[PneumaticConfig] = []
-
+    state = _ParseState(motors=[], motor_groups=[], pneumatics=[])
     for device in robot_config:
-        device_type = device.get("deviceType", "")
-        device_name = device.get("name", "unknown")
-        ports = device.get("port", [])
-        settings = device.get("setting", {})
-
-        if device_type == "Motor":
-            # Individual motor
-            if ports:
-                motors.append(MotorConfig(
-                    port=ports[0],
-                    name=device_name,
-                    reversed=settings.get("reversed", "false") == "true"
-                ))
-
-        elif device_type == "Drivetrain":
-            # Drivetrain (includes motors)
-            # Ports format: [left_port, right_port, gyro_port] for 2-motor
-            # or [left1, left2, right1, right2, gyro_port] for 4-motor
-            drive_type = settings.get("type", "2-motor")
-
-            if drive_type == "2-motor" and len(ports) >= 2:
-                left_ports = [ports[0]]
-                right_ports = [ports[1]]
-            elif drive_type == "4-motor" and len(ports) >= 4:
-                left_ports = [ports[0], ports[1]]
-                right_ports = [ports[2], ports[3]]
-            else:
-                left_ports = [ports[0]] if ports else [1]
-                right_ports = [ports[1]] if len(ports) > 1 else [2]
-
-            # Parse wheel size (e.g., "200mm" -> 200)
-            wheel_size_str = settings.get("wheelSize", "200mm")
-            wheel_size = float(''.join(c for c in wheel_size_str if c.isdigit() or c == '.') or "200")
-
-            # Parse gear ratio (e.g., "1:1" -> 1.0, "2:1" -> 2.0)
-            gear_ratio_str = settings.get("gearRatio", "1:1")
-            if ":" in gear_ratio_str:
-                parts = gear_ratio_str.split(":")
-                try:
-                    gear_ratio = float(parts[0]) / float(parts[1])
-                except:
-                    gear_ratio = 1.0
-            else:
-                gear_ratio = 1.0
-
-            drivetrain = DrivetrainConfig(
-                left_ports=left_ports,
-                right_ports=right_ports,
-                name=device_name,
-                wheel_size=wheel_size,
-                track_width=float(settings.get("width", 173)),
-                wheelbase=float(settings.get("wheelbase", 76)),
-                gear_ratio=gear_ratio,
-                drive_type=drive_type
-            )
-
-        elif device_type == "Controller":
-            controller = ControllerConfig(
-                name=device_name,
-                drive_mode=settings.get("drive", "split")
-            )
-
-        elif device_type == "MotorGroup":
-            # Motor group - multiple motors working together
-            motor_groups.append(MotorGroupConfig(
-                ports=ports,
-                name=device_name,
-                motor_b_reversed=settings.get("motor_b_reversed", "false") == "true"
-            ))
-
-        elif device_type == "Pneumatic":
-            # Pneumatic cylinder
-            if ports:
-                pneumatics.append(PneumaticConfig(
-                    port=ports[0],
-                    name=device_name
-                ))
+        handler = _DEVICE_HANDLERS.get(device.get("deviceType", ""))
+        if handler is not None:
+            handler(device, state)
 
     # Extract project name from code comments if present
-    project_name = "VEXcode Project"
-    for line in python_code.split("\n"):
-        if "Project:" in line:
-            project_name = line.split("Project:")[-1].strip()
-            break
+    m = _PROJECT_RE.search(python_code)
+    project_name = m.group(1).strip() if m else "VEXcode Project"
 
     return RobotConfig(
-        motors=motors,
-        drivetrain=drivetrain,
-        controller=controller,
-        motor_groups=motor_groups,
-        pneumatics=pneumatics,
+        motors=state.motors,
+        drivetrain=state.drivetrain,
+        controller=state.controller,
+        motor_groups=state.motor_groups,
+        pneumatics=state.pneumatics,
         brain_gen=brain_gen,
         python_code=python_code,
         project_name=project_name
@@ -208,61 +270,61 @@ def describe_robot(config: RobotConfig) -> str:
     Returns:
         Multi-line string describing the robot
     """
-    lines = [
-        f"Robot: {config.project_name}",
-        f"Brain Generation: {config.brain_gen}",
-        ""
-    ]
+    buf = io.StringIO()
+    write = buf.write
+    write(f"Robot: {config.project_name}\n"
+          f"Brain Generation: {config.brain_gen}\n"
+          "\n")
 
     if config.drivetrain:
         dt = config.drivetrain
-        lines.append("Drivetrain:")
-        lines.append(f"  Type: {dt.drive_type}")
-        lines.append(f"  Left motor(s): Port {', '.join(map(str, dt.left_ports))}")
-        lines.append(f"  Right motor(s): Port {', '.join(map(str, dt.right_ports))}")
-        lines.append(f"  Wheel size: {dt.wheel_size}mm")
-        lines.append(f"  Track width: {dt.track_width}mm")
-        lines.append(f"  Gear ratio: {dt.gear_ratio}:1")
-        lines.append("")
+        write("Drivetrain:\n"
+              f"  Type: {dt.drive_type}\n"
+              f"  Left motor(s): Port {', '.join(map(str, dt.left_ports))}\n"
+              f"  Right motor(s): Port {', '.join(map(str, dt.right_ports))}\n"
+              f"  Wheel size: {dt.wheel_size}mm\n"
+              f"  Track width: {dt.track_width}mm\n"
+              f"  Gear ratio: {dt.gear_ratio}:1\n"
+              "\n")
 
     if config.controller:
         ctrl = config.controller
-        lines.append("Controller:")
-        lines.append(f"  Drive mode: {ctrl.drive_mode}")
+        write(f"Controller:\n  Drive mode: {ctrl.drive_mode}\n")
 
         if ctrl.drive_mode == "split":
-            lines.append("  Left stick (A): Forward/Back")
-            lines.append("  Right stick (C): Turn Left/Right")
+            write("  Left stick (A): Forward/Back\n"
+                  "  Right stick (C): Turn Left/Right\n")
         elif ctrl.drive_mode == "left":
-            lines.append("  Left stick: Arcade (A=turn, B=drive)")
+            write("  Left stick: Arcade (A=turn, B=drive)\n")
         elif ctrl.drive_mode == "right":
-            lines.append("  Right stick: Arcade (C=turn, D=drive)")
+            write("  Right stick: Arcade (C=turn, D=drive)\n")
         elif ctrl.drive_mode == "tank":
-            lines.append("  Left stick (B): Left motors")
-            lines.append("  Right stick (D): Right motors")
-        lines.append("")
+            write("  Left stick (B): Left motors\n"
+                  "  Right stick (D): Right motors\n")
+        write("\n")
 
     if config.motors:
-        lines.append("Additional Motors:")
+        write("Additional Motors:\n")
         for motor in config.motors:
             rev = " (reversed)" if motor.reversed else ""
-            lines.append(f"  {motor.name}: Port {motor.port}{rev}")
-        lines.append("")
+            write(f"  {motor.name}: Port {motor.port}{rev}\n")
+        write("\n")
 
     if config.motor_groups:
-        lines.append("Motor Groups:")
+        write("Motor Groups:\n")
         for mg in config.motor_groups:
             ports_str = ", ".join(f"P{p}" for p in mg.ports)
             rev = " (B reversed)" if mg.motor_b_reversed else ""
-            lines.append(f"  {mg.name}: {ports_str}{rev}")
-        lines.append("")
+            write(f"  {mg.name}: {ports_str}{rev}\n")
+        write("\n")
 
     if config.pneumatics:
-        lines.append("Pneumatics:")
+        write("Pneumatics:\n")
         for pn in config.pneumatics:
-            lines.append(f"  {pn.name}: Port {pn.port}")
+            write(f"  {pn.name}: Port {pn.port}\n")
 
-    return "\n".join(lines)
+    # Lines were joined with "\n" before: no trailing newline
+    return buf.getvalue()[:-1]
 
 
 # Test if run directly
@@ -0,0 +1,50 @@
+"""
+Robot Runtime Setup
+===================
+Prepares the interpreter for running robot code against vex_stub:
+installs the stub as the "vex" module and compiles the robot program.
+"""
+
+import hashlib
+import sys
+from types import CodeType
+
+import vex_stub
+
+
+# (filename, source digest) -> code object
+_code_cache: dict[tuple[str, bytes], CodeType] = {}
+
+
+def compile_robot_code(source: str, filename: str) -> CodeType:
+    """Compile robot code, reusing the cached code object for identical source."""
+    # The filename is part of the key because it is baked into the code
+    # object (tracebacks point at it)
+    key = (filename, hashlib.blake2b(source.encode(), digest_size=16).digest())
+    code = _code_cache.get(key)
+    if code is None:
+        code = _code_cache[key] = compile(source, filename, 'exec')
+    return code
+
+
+def prepare_runtime(path) -> tuple[dict, vex_stub.Controller]:
+    """
+    Reset stub state and set up a namespace for running robot code.
+
+    Args:
+        path: Path of the robot project (used for __file__)
+
+    Returns:
+        (globals dict to exec the robot code in, the Controller singleton)
+    """
+    vex_stub.reset_all()
+
+    # Robot code does "from vex import *"; urandom is a MicroPython module
+    sys.modules['vex'] = vex_stub
+    sys.modules['urandom'] = vex_stub.urandom
+
+    robot_globals = {
+        '__name__': '__main__',
+        '__file__': str(path),
+    }
+    return robot_globals, vex_stub.Controller()
@@ -5,12 +5,33 @@ Mock implementation of the VEX library for local testing.
 This allows robot code to run unchanged outside of VEXcode IQ.
 """
 
+import heapq
+import itertools
+import random as _random
 import threading
 import time
+from contextlib import contextmanager
 from typing import Callable, Optional
 from dataclasses import dataclass, field
 from enum import Enum, auto
 
+# What robot code gets from "from vex import *": the VEX IQ API only.
+# Simulator plumbing (scheduler, GUI callbacks, reset_all) stays reachable
+# as vex_stub.<name> but must not leak into robot programs.
+__all__ = [
+    # Constants
+    'FORWARD', 'REVERSE', 'LEFT', 'RIGHT',
+    'PERCENT', 'MM', 'INCHES', 'DEGREES', 'TURNS', 'SECONDS', 'MSEC',
+    'XAXIS', 'YAXIS', 'ZAXIS',
+    'COAST', 'BRAKE', 'HOLD',
+    'Ports',
+    # Devices
+    'Motor', 'MotorGroup', 'DriveTrain', 'SmartDrive', 'Inertial',
+    'Brain', 'Controller', 'Pneumatic',
+    # Utilities
+    'wait', 'sleep', 'Thread', 'urandom',
+]
+
 # ============================================================
 # CONSTANTS - Match VEX library constants
 # ============================================================
@@ -60,34 +81,168 @@ class Ports:
     PORT12 = 12
 
 
+# Size of the per-port registries (index 0 unused)
+_PORT_SLOTS = Ports.PORT12 + 1
+
+
+# ============================================================
+# MOVE DURATIONS - Approximate timing for *_for commands
+# ============================================================
+
+# Motor.spin_for: unit -> f(amount, speed percent) in seconds.
+# Approximate: 100% velocity = 200 deg/sec
+_SPIN_DURATIONS: dict[str, Callable[[float, float], float]] = {
+    SECONDS: lambda amount, speed: amount,
+    MSEC: lambda amount, speed: amount * 0.001,
+    DEGREES: lambda amount, speed: amount / (speed * 2),
+    TURNS: lambda amount, speed: amount * 180 / speed,
+}
+
+# DriveTrain.drive_for: seconds per unit of distance (~200mm/sec at 50% speed)
+_DRIVE_SECONDS_PER_UNIT: dict[str, float] = {
+    MM: 1 / 200,
+    INCHES: 25.4 / 200,
+    SECONDS: 1.0,
+}
+
+# DriveTrain.turn_for: seconds per unit of angle (~90 deg/sec at 50% speed)
+_TURN_SECONDS_PER_UNIT: dict[str, float] = {
+    DEGREES: 1 / 90,
+    TURNS: 360 / 90,
+}
+
+
+def _unknown_unit_duration(amount: float, speed: float) -> float:
+    return 1
+
+
 # ============================================================
 # CALLBACK REGISTRY - For GUI updates
 # ============================================================
 
 class CallbackRegistry:
     """Central registry for callbacks that notify the GUI of state changes."""
-    _motor_callbacks: list[Callable] = []
-    _brain_callbacks: list[Callable] = []
+    # Tuples, replaced on registration, so notify never iterates a list
+    # that is being appended to
+    _motor_callbacks: tuple[Callable, ...] = ()
+    _brain_callbacks: tuple[Callable, ...] = ()
+    # Per-thread batch state: robot code and its Thread()s batch independently
+    _batch = threading.local()
 
     @classmethod
     def register_motor_callback(cls, callback: Callable):
-        cls._motor_callbacks.append(callback)
+        cls._motor_callbacks = cls._motor_callbacks + (callback,)
 
     @classmethod
     def register_brain_callback(cls, callback: Callable):
-        cls._brain_callbacks.append(callback)
+        cls._brain_callbacks = cls._brain_callbacks + (callback,)
 
     @classmethod
     def notify_motor_update(cls, motor: 'Motor'):
-        for cb in cls._motor_callbacks:
+        callbacks = cls._motor_callbacks
+        if not callbacks:
+            return
+        pending = getattr(cls._batch, 'pending', None)
+        if pending is not None:
+            # Inside batch(): keep one entry per port, flushed at the end
+            pending[motor.port] = motor
+            return
+        for cb in callbacks:
             cb(motor)
 
+    @classmethod
+    def notify_motor_updates(cls, motors):
+        """Notify each callback once per motor."""
+        for cb in cls._motor_callbacks:
+            for motor in motors:
+                cb(motor)
+
+    @classmethod
+    @contextmanager
+    def batch(cls):
+        """
+        Coalesce motor updates until the outermost batch exits.
+
+        Used by multi-motor operations so each callback sees every motor
+        once, after all of them have been updated.
+        """
+        state = cls._batch
+        if not cls._motor_callbacks or getattr(state, 'pending', None) is not None:
+            # Nobody listening, or nested (the outermost batch flushes)
+            yield
+            return
+        state.pending = pending = {}
+        try:
+            yield
+        finally:
+            state.pending = None
+            if pending:
+                cls.notify_motor_updates(pending.values())
+
     @classmethod
     def notify_brain_update(cls, brain: 'Brain', message: str):
-        for cb in cls._brain_callbacks:
+        callbacks = cls._brain_callbacks
+        if not callbacks:
+            return
+        for cb in callbacks:
             cb(brain, message)
 
 
+# ============================================================
+# SCHEDULER - Timed actions for non-blocking commands
+# ============================================================
+
+class Scheduler:
+    """
+    Runs callbacks at a deadline, driven by the simulator tick.
+
+    Non-blocking commands (e.g. spin_for with wait_for=False) schedule their
+    completion here instead of needing a thread parked on time.sleep().
+    """
+
+    # Heap of [deadline, sequence, callback]; callback is None once cancelled
+    # or taken. Callbacks run outside the lock, so they may cancel/schedule.
+    _heap: list[list] = []
+    _counter = itertools.count()
+    _lock = threading.Lock()
+
+    @classmethod
+    def schedule(cls, delay: float, callback: Callable) -> list:
+        """Run callback after delay seconds. Returns an entry for cancel()."""
+        entry = [time.monotonic() + delay, next(cls._counter), callback]
+        with cls._lock:
+            heapq.heappush(cls._heap, entry)
+        return entry
+
+    @classmethod
+    def cancel(cls, entry: list):
+        """
+        Cancel a scheduled callback (no-op if it already ran).
+
+        A callback already taken by run_due() on another thread may still run;
+        callbacks that must not act after a cancel check their own entry.
+        """
+        with cls._lock:
+            entry[2] = None
+
+    @classmethod
+    def run_due(cls, now: Optional[float] = None):
+        """Run every callback whose deadline has passed (called each tick)."""
+        if not cls._heap:
+            return
+        if now is None:
+            now = time.monotonic()
+        due = []
+        with cls._lock:
+            heap = cls._heap
+            while heap and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                if entry[2] is not None:
+                    due.append(entry[2])
+                    entry[2] = None
+        for callback in due:
+            callback()
+
 # ============================================================
 # MOTOR CLASS
 # ============================================================
@@ -95,84 +250,105 @@ class CallbackRegistry:
 class Motor:
     """Mock Motor class that tracks state."""
 
-    _instances: dict[int, 'Motor'] = {}
+    __slots__ = ('port', 'gear_ratio', 'reversed', '_velocity', '_target_velocity',
+                 '_spinning', '_direction', '_position', '_brake_mode',
+                 '_wheel_velocity', '_actual_velocity', '_wheel_sign', '_actual_sign',
+                 '_pending_stop', '_lock')
+
+    # Indexed by port number
+    _instances: list[Optional['Motor']] = [None] * _PORT_SLOTS
+    # Registered motors in port order (backs get_all_instances)
+    _instance_list: tuple['Motor', ...] = ()
+    # Ports whose state changed since the last take_dirty_ports() call.
+    # State is always written before the port is marked.
+    _dirty_ports: set[int] = set()
 
     def __init__(self, port: int, gear_ratio: float = 1.0, reversed: bool = False):
+        if not 0 < port < _PORT_SLOTS:
+            raise ValueError(f"Invalid motor port: {port}")
         self.port = port
         self.gear_ratio = gear_ratio
         self.reversed = reversed
         self._velocity = 0
         self._target_velocity = 0
         self._spinning = False
-        self._direction = FORWARD
+        self._set_direction(FORWARD)
         self._position = 0.0  # degrees
         self._brake_mode = COAST
+        # Derived from _velocity/_direction/reversed, kept current by _refresh_velocities()
+        self._wheel_velocity = 0
+        self._actual_velocity = 0
+        # Scheduler entry that ends a non-blocking spin_for
+        self._pending_stop: Optional[list] = None
+        # Guards motion state against the scheduled stop, which runs on the
+        # bridge thread
+        self._lock = threading.RLock()
 
         # Register this motor instance
         Motor._instances[port] = self
+        Motor._instance_list = tuple(m for m in Motor._instances if m is not None)
+        Motor._dirty_ports.add(port)
 
     @classmethod
     def get_instance(cls, port: int) -> Optional['Motor']:
-        return cls._instances.get(port)
+        return cls._instances[port] if 0 < port < _PORT_SLOTS else None
 
     @classmethod
     def get_all_instances(cls) -> dict[int, 'Motor']:
-        return cls._instances.copy()
+        return {m.port: m for m in cls._instance_list}
+
+    @classmethod
+    def take_dirty_ports(cls) -> list[int]:
+        """Return and clear the ports of motors changed since the last call."""
+        dirty = cls._dirty_ports
+        ports = []
+        while dirty:
+            ports.append(dirty.pop())
+        return ports
 
     def set_velocity(self, velocity: float, unit=PERCENT):
         """Set the motor velocity."""
-        self._target_velocity = velocity
-        if self._spinning:
+        with self._lock:
+            self._target_velocity = velocity
+            if not self._spinning:
+                return
             self._velocity = velocity
-            CallbackRegistry.notify_motor_update(self)
+            self._refresh_velocities()
+            Motor._dirty_ports.add(self.port)
+        CallbackRegistry.notify_motor_update(self)
 
     def spin(self, direction=FORWARD):
         """Start spinning the motor."""
-        self._direction = direction
-        self._spinning = True
-        self._velocity = self._target_velocity
-
-        # Apply reversal
-        actual_velocity = self._velocity
-        if self.reversed:
-            actual_velocity = -actual_velocity
-        if direction == REVERSE:
-            actual_velocity = -actual_velocity
-
+        with self._lock:
+            self._cancel_pending_stop()
+            self._start(direction)
         CallbackRegistry.notify_motor_update(self)
 
     def spin_for(self, direction, amount: float, unit=DEGREES, wait_for: bool = True):
         """Spin for a specific amount."""
-        self._direction = direction
-        self._spinning = True
-        self._velocity = self._target_velocity
+        with self._lock:
+            self._cancel_pending_stop()
+            self._start(direction)
+
+            # Calculate duration based on unit (a stopped motor is timed at 50%)
+            speed = abs(self._velocity) or 50
+            duration = _SPIN_DURATIONS.get(unit, _unknown_unit_duration)(amount, speed)
+
+            if not wait_for:
+                # Scheduled under the lock, so _pending_stop is set before it can fire
+                entry = Scheduler.schedule(duration, lambda: self._finish_spin_for(entry))
+                self._pending_stop = entry
         CallbackRegistry.notify_motor_update(self)
 
-        # Calculate duration based on unit
-        if unit == SECONDS:
-            duration = amount
-        elif unit == MSEC:
-            duration = amount / 1000
-        elif unit == DEGREES:
-            # Approximate: assume 100% velocity = 200 deg/sec
-            speed = abs(self._velocity) if self._velocity != 0 else 50
-            duration = amount / (speed * 2)
-        elif unit == TURNS:
-            speed = abs(self._velocity) if self._velocity != 0 else 50
-            duration = (amount * 360) / (speed * 2)
-        else:
-            duration = 1
-
         if wait_for:
             time.sleep(duration)
             self.stop()
 
     def stop(self, brake_mode=None):
         """Stop the motor."""
-        self._spinning = False
-        self._velocity = 0
-        if brake_mode:
-            self._brake_mode = brake_mode
+        with self._lock:
+            self._cancel_pending_stop()
+            self._halt(brake_mode)
         CallbackRegistry.notify_motor_update(self)
 
     def set_stopping(self, mode):
@@ -191,15 +367,56 @@ class Motor:
         """Check if motor is spinning."""
         return self._spinning
 
+    def _start(self, direction):
+        """Write the spinning state (caller holds _lock)."""
+        self._set_direction(direction)
+        self._spinning = True
+        self._velocity = self._target_velocity
+        self._refresh_velocities()
+        Motor._dirty_ports.add(self.port)
+
+    def _halt(self, brake_mode=None):
+        """Write the stopped state (caller holds _lock)."""
+        self._spinning = False
+        self._velocity = 0
+        self._wheel_velocity = self._actual_velocity = 0
+        if brake_mode:
+            self._brake_mode = brake_mode
+        Motor._dirty_ports.add(self.port)
+
+    def _finish_spin_for(self, entry: list):
+        """Scheduled end of a non-blocking spin_for; skipped if superseded."""
+        with self._lock:
+            if self._pending_stop is not entry:
+                return
+            self._pending_stop = None
+            self._halt()
+        CallbackRegistry.notify_motor_update(self)
+
+    def _cancel_pending_stop(self):
+        """Drop the stop scheduled by a non-blocking spin_for (caller holds _lock)."""
+        if self._pending_stop is not None:
+            Scheduler.cancel(self._pending_stop)
+            self._pending_stop = None
+
+    def _set_direction(self, direction):
+        """Set the direction and the velocity signs derived from it."""
+        self._direction = direction
+        # +1/-1: REVERSE flips the wheel; reversed mounting flips it back for the shaft
+        reverse = direction == REVERSE
+        self._wheel_sign = 1 - 2 * reverse
+        self._actual_sign = 1 - 2 * (reverse ^ bool(self.reversed))
+
+    def _refresh_velocities(self):
+        """Recompute the derived velocities after _velocity or _direction changes."""
+        vel = self._velocity
+        self._wheel_velocity = vel * self._wheel_sign
+        self._actual_velocity = vel * self._actual_sign
+
     @property
     def actual_velocity(self) -> float:
         """Get velocity accounting for direction and reversal."""
-        vel = self._velocity
-        if self.reversed:
-            vel = -vel
-        if self._direction == REVERSE:
-            vel = -vel
-        return vel
+        return self._actual_velocity
 
     @property
     def wheel_velocity(self) -> float:
@@ -209,10 +426,7 @@ class Motor:
         not the physical motor shaft direction. The 'reversed' flag only
         compensates for motor mounting and shouldn't affect the wheel direction.
         """
-        vel = self._velocity
-        if self._direction == REVERSE:
-            vel = -vel
-        return vel
+        return self._wheel_velocity
 
 
 # ============================================================
@@ -222,6 +436,8 @@ class Motor:
 class ControllerAxis:
     """Represents a controller joystick axis."""
 
+    __slots__ = ('name', '_position')
+
     def __init__(self, name: str):
         self.name = name
         self._position = 0
@@ -232,19 +448,24 @@ class ControllerAxis:
 
     def set_position(self, value: int):
         """Set axis position (called by GUI)."""
-        self._position = max(-100, min(100, value))
+        # Inline clamp to -100..100 (no min/max calls)
+        self._position = value if -100 <= value <= 100 else (-100 if value < 0 else 100)
 
 
 class ControllerButton:
     """Represents a controller button."""
 
+    __slots__ = ('name', '_pressed', '_just_pressed', '_just_released',
+                 '_press_callbacks', '_release_callbacks')
+
     def __init__(self, name: str):
         self.name = name
         self._pressed = False
         self._just_pressed = False
         self._just_released = False
-        self._press_callbacks: list[Callable] = []
-        self._release_callbacks: list[Callable] = []
+        # Tuples, replaced on registration (like CallbackRegistry)
+        self._press_callbacks: tuple[Callable, ...] = ()
+        self._release_callbacks: tuple[Callable, ...] = ()
 
     def pressing(self) -> bool:
         """Check if button is currently pressed."""
@@ -252,11 +473,11 @@ class ControllerButton:
 
     def pressed(self, callback: Callable):
         """Register callback for button press."""
-        self._press_callbacks.append(callback)
+        self._press_callbacks = self._press_callbacks + (callback,)
 
     def released(self, callback: Callable):
         """Register callback for button release."""
-        self._release_callbacks.append(callback)
+        self._release_callbacks = self._release_callbacks + (callback,)
 
     def set_pressed(self, value: bool):
         """Set button state (called by GUI)."""
@@ -265,11 +486,19 @@ class ControllerButton:
 
         if value and not was_pressed:
             # Just pressed
-            for cb in self._press_callbacks:
-                cb()
+            callbacks = self._press_callbacks
         elif not value and was_pressed:
             # Just released
-            for cb in self._release_callbacks:
+            callbacks = self._release_callbacks
+        else:
+            return
+
+        if not callbacks:
+            return
+        if len(callbacks) == 1:
+            callbacks[0]()
+        else:
+            for cb in callbacks:
                 cb()
 
 
@@ -277,17 +506,18 @@ class Controller:
     """Mock Controller class - singleton pattern."""
 
     _instance: Optional['Controller'] = None
+    # Set on the instance once __init__ has run
+    _initialized = False
 
     def __new__(cls):
         """Return existing instance if one exists (singleton)."""
-        if cls._instance is not None:
-            return cls._instance
-        return super().__new__(cls)
+        return cls._instance or super().__new__(cls)
 
     def __init__(self):
-        # Skip re-initialization if already set up
-        if Controller._instance is not None:
+        # Skip re-initialization of the shared instance
+        if self._initialized:
             return
+        self._initialized = True
 
         # Axes
         self.axisA = ControllerAxis("A")  # Left stick Y
@@ -305,12 +535,37 @@ class Controller:
         self.buttonFUp = ControllerButton("F-Up")
         self.buttonFDown = ControllerButton("F-Down")
 
+        # Fixed order used by apply_gamepad()
+        self._axes = (self.axisA, self.axisB, self.axisC, self.axisD)
+        self._buttons = (
+            self.buttonLUp, self.buttonLDown, self.buttonRUp, self.buttonRDown,
+            self.buttonEUp, self.buttonEDown, self.buttonFUp, self.buttonFDown,
+        )
+
         Controller._instance = self
 
     @classmethod
     def get_instance(cls) -> Optional['Controller']:
         return cls._instance
 
+    def apply_gamepad(self, axes: tuple[int, ...], buttons: tuple[bool, ...]):
+        """
+        Set the whole controller state in one call (called by GUI).
+
+        Args:
+            axes: Positions for axes A, B, C, D
+            buttons: Pressed states for L-Up, L-Down, R-Up, R-Down,
+                E-Up, E-Down, F-Up, F-Down
+        """
+        for axis, value in zip(self._axes, axes):
+            axis.set_position(value)
+
+        # Buttons go through set_pressed only on a change, which is the only
+        # case where it fires callbacks
+        for button, value in zip(self._buttons, buttons):
+            if value != button._pressed:
+                button.set_pressed(value)
+
 
 # ============================================================
 # DRIVETRAIN CLASS
@@ -333,6 +588,11 @@ class DriveTrain:
         self.gear_ratio = gear_ratio
         self._velocity = 50
         self._turn_velocity = 50
+        # Scheduler entry that ends a non-blocking drive_for/turn_for
+        self._pending_stop: Optional[list] = None
+        # Guards commands against the scheduled stop, which runs on the bridge
+        # thread. Taken before the motors' own locks, never after.
+        self._lock = threading.RLock()
 
         DriveTrain._instance = self
 
@@ -349,56 +609,77 @@ class DriveTrain:
     def drive(self, direction=FORWARD):
         """Start driving."""
         vel = self._velocity if direction == FORWARD else -self._velocity
-        self.left_motor.set_velocity(vel, PERCENT)
-        self.right_motor.set_velocity(vel, PERCENT)
-        self.left_motor.spin(FORWARD)
-        self.right_motor.spin(FORWARD)
+        with self._lock, CallbackRegistry.batch():
+            self._cancel_pending_stop()
+            self.left_motor.set_velocity(vel, PERCENT)
+            self.right_motor.set_velocity(vel, PERCENT)
+            self.left_motor.spin(FORWARD)
+            self.right_motor.spin(FORWARD)
 
     def drive_for(self, direction, distance: float, unit=MM, wait_for: bool = True):
         """Drive for a specific distance."""
         self.drive(direction)
 
         # Calculate duration based on distance (approximate)
-        if unit == MM:
-            duration = distance / 200  # ~200mm/sec at 50% speed
-        elif unit == INCHES:
-            duration = (distance * 25.4) / 200
-        elif unit == SECONDS:
-            duration = distance
-        else:
-            duration = 1
-
-        if wait_for:
-            time.sleep(duration)
-            self.stop()
+        seconds_per_unit = _DRIVE_SECONDS_PER_UNIT.get(unit)
+        duration = distance * seconds_per_unit if seconds_per_unit is not None else 1
+        self._stop_after(duration, wait_for)
 
     def turn(self, direction=RIGHT):
         """Start turning."""
         vel = self._turn_velocity
-        if direction == RIGHT:
-            self.left_motor.set_velocity(vel, PERCENT)
-            self.right_motor.set_velocity(-vel, PERCENT)
-        else:
-            self.left_motor.set_velocity(-vel, PERCENT)
-            self.right_motor.set_velocity(vel, PERCENT)
-        self.left_motor.spin(FORWARD)
-        self.right_motor.spin(FORWARD)
+        with self._lock, CallbackRegistry.batch():
+            self._cancel_pending_stop()
+            if direction == RIGHT:
+                self.left_motor.set_velocity(vel, PERCENT)
+                self.right_motor.set_velocity(-vel, PERCENT)
+            else:
+                self.left_motor.set_velocity(-vel, PERCENT)
+                self.right_motor.set_velocity(vel, PERCENT)
+            self.left_motor.spin(FORWARD)
+            self.right_motor.spin(FORWARD)
 
     def turn_for(self, direction, angle: float, unit=DEGREES, wait_for: bool = True):
         """Turn for a specific angle."""
         self.turn(direction)
 
-        # Calculate duration (approximate)
-        duration = angle / 90  # ~90 deg/sec at 50% speed
+        # Calculate duration (approximate); unknown units are timed as degrees
+        duration = angle * _TURN_SECONDS_PER_UNIT.get(unit, 1 / 90)
+        self._stop_after(duration, wait_for)
+
+    def stop(self, brake_mode=None):
+        """Stop the drivetrain."""
+        with self._lock, CallbackRegistry.batch():
+            self._cancel_pending_stop()
+            self.left_motor.stop(brake_mode)
+            self.right_motor.stop(brake_mode)
 
+    def _stop_after(self, duration: float, wait_for: bool):
+        """Stop after duration seconds: blocking, or via the scheduler."""
         if wait_for:
             time.sleep(duration)
             self.stop()
-
-    def stop(self, brake_mode=None):
-        """Stop the drivetrain."""
-        self.left_motor.stop(brake_mode)
-        self.right_motor.stop(brake_mode)
+            return
+        with self._lock:
+            # Scheduled under the lock, so _pending_stop is set before it can fire
+            entry = Scheduler.schedule(duration, lambda: self._finish_move(entry))
+            self._pending_stop = entry
+
+    def _finish_move(self, entry: list):
+        """Scheduled end of a non-blocking drive_for/turn_for; skipped if superseded."""
+        with self._lock:
+            if self._pending_stop is not entry:
+                return
+            self._pending_stop = None
+            with CallbackRegistry.batch():
+                self.left_motor.stop()
+                self.right_motor.stop()
+
+    def _cancel_pending_stop(self):
+        """Drop the pending drive_for/turn_for stop, if any (caller holds _lock)."""
+        if self._pending_stop is not None:
+            Scheduler.cancel(self._pending_stop)
+            self._pending_stop = None
 
 
 # ============================================================
@@ -408,6 +689,8 @@ class DriveTrain:
 class BrainScreen:
     """Mock Brain screen."""
 
+    __slots__ = ('_cursor_row', '_cursor_col', '_lines')
+
     def __init__(self):
         self._cursor_row = 1
         self._cursor_col = 1
@@ -439,16 +722,18 @@ class BrainScreen:
 class BrainTimer:
     """Mock Brain timer."""
 
+    __slots__ = ('_start_ns',)
+
     def __init__(self):
-        self._start_time = time.time()
+        self._start_ns = time.monotonic_ns()
 
-    def system(self) -> float:
+    def system(self) -> int:
         """Get system time in ms."""
-        return (time.time() - self._start_time) * 1000
+        return (time.monotonic_ns() - self._start_ns) // 1_000_000
 
     def clear(self):
         """Reset timer."""
-        self._start_time = time.time()
+        self._start_ns = time.monotonic_ns()
 
 
 class Brain:
@@ -501,8 +786,7 @@ class Inertial:
     def acceleration(self, axis) -> float:
         """Get acceleration on axis."""
         # Return small random-ish values for seed generation
-        import random
-        return random.uniform(-1, 1)
+        return _random.uniform(-1, 1)
 
 
 # ============================================================
@@ -543,7 +827,11 @@ class MotorGroup:
     _instances: list['MotorGroup'] = []
 
     def __init__(self, *motors: Motor):
-        self.motors = list(motors)
+        self.motors = motors
+        # Bound methods of the member motors, resolved once
+        self._set_velocity_fns = tuple(m.set_velocity for m in motors)
+        self._spin_fns = tuple(m.spin for m in motors)
+        self._stop_fns = tuple(m.stop for m in motors)
         self._velocity = 50
         self._direction = FORWARD
         self._spinning = False
@@ -552,32 +840,35 @@ class MotorGroup:
     def set_velocity(self, velocity: float, unit=PERCENT):
         """Set velocity for all motors in group."""
         self._velocity = velocity
-        for motor in self.motors:
-            motor.set_velocity(velocity, unit)
+        with CallbackRegistry.batch():
+            for set_velocity in self._set_velocity_fns:
+                set_velocity(velocity, unit)
 
     def spin(self, direction=FORWARD):
         """Spin all motors in group."""
         self._direction = direction
         self._spinning = True
-        for motor in self.motors:
-            motor.spin(direction)
+        with CallbackRegistry.batch():
+            for spin in self._spin_fns:
+                spin(direction)
 
     def spin_for(self, direction, amount: float, unit=DEGREES, wait_for: bool = True):
         """Spin all motors for a specific amount."""
         self._direction = direction
         self._spinning = True
         # Only wait on the last motor
+        last = len(self.motors) - 1
         for i, motor in enumerate(self.motors):
-            wait = wait_for and (i == len(self.motors) - 1)
-            motor.spin_for(direction, amount, unit, wait)
+            motor.spin_for(direction, amount, unit, wait_for and i == last)
         if wait_for:
             self._spinning = False
 
     def stop(self, brake_mode=None):
         """Stop all motors in group."""
         self._spinning = False
-        for motor in self.motors:
-            motor.stop(brake_mode)
+        with CallbackRegistry.batch():
+            for stop in self._stop_fns:
+                stop(brake_mode)
 
     def set_stopping(self, mode):
         """Set brake mode for all motors."""
@@ -592,33 +883,56 @@ class MotorGroup:
 class Pneumatic:
     """Mock Pneumatic class for pneumatic cylinders."""
 
-    _instances: dict[int, 'Pneumatic'] = {}
+    __slots__ = ('port', '_extended', '_pump_on',
+                 '_msg_extend', '_msg_retract', '_msg_pump_on', '_msg_pump_off')
+
+    # Indexed by port number
+    _instances: list[Optional['Pneumatic']] = [None] * _PORT_SLOTS
+    _instance_list: tuple['Pneumatic', ...] = ()
+    # Same contract as Motor._dirty_ports
+    _dirty_ports: set[int] = set()
 
     def __init__(self, port: int):
+        if not 0 < port < _PORT_SLOTS:
+            raise ValueError(f"Invalid pneumatic port: {port}")
         self.port = port
         self._extended = False
         self._pump_on = True
+
+        # Log lines are fixed per port, so format them once
+        prefix = f"[PNEUMATIC P{port}]"
+        self._msg_extend = f"{prefix} Extended"
+        self._msg_retract = f"{prefix} Retracted"
+        self._msg_pump_on = f"{prefix} Pump ON"
+        self._msg_pump_off = f"{prefix} Pump OFF"
+
         Pneumatic._instances[port] = self
+        Pneumatic._instance_list = tuple(p for p in Pneumatic._instances if p is not None)
+        Pneumatic._dirty_ports.add(port)
 
     def extend(self, cylinder: str = "cylinder1"):
         """Extend the pneumatic cylinder."""
         self._extended = True
-        print(f"[PNEUMATIC P{self.port}] Extended")
+        Pneumatic._dirty_ports.add(self.port)
+        print(self._msg_extend)
 
     def retract(self, cylinder: str = "cylinder1"):
         """Retract the pneumatic cylinder."""
         self._extended = False
-        print(f"[PNEUMATIC P{self.port}] Retracted")
+        Pneumatic._dirty_ports.add(self.port)
+        print(self._msg_retract)
 
     def pump_on(self):
         """Turn on the pneumatic pump."""
         self._pump_on = True
-        print(f"[PNEUMATIC P{self.port}] Pump ON")
+        Pneumatic._dirty_ports.add(self.port)
+        print(self._msg_pump_on)
 
     def pump_off(self):
         """Turn off the pneumatic pump."""
         self._pump_on = False
-        print(f"[PNEUMATIC P{self.port}] Pump OFF")
+        Pneumatic._dirty_ports.add(self.port)
+        print(self._msg_pump_off)
 
     def is_extended(self) -> bool:
         """Check if cylinder is extended."""
@@ -626,7 +940,20 @@ class Pneumatic:
 
     @classmethod
     def get_all_instances(cls) -> dict[int, 'Pneumatic']:
-        return cls._instances.copy()
+        return {p.port: p for p in cls._instance_list}
+
+    @classmethod
+    def get_instance(cls, port: int) -> Optional['Pneumatic']:
+        return cls._instances[port] if 0 < port < _PORT_SLOTS else None
+
+    @classmethod
+    def take_dirty_ports(cls) -> list[int]:
+        """Return and clear the ports of pneumatics changed since the last call."""
+        dirty = cls._dirty_ports
+        ports = []
+        while dirty:
+            ports.append(dirty.pop())
+        return ports
 
 
 # ============================================================
@@ -663,8 +990,6 @@ class Thread:
 # URANDOM MOCK (MicroPython compatibility)
 # ============================================================
 
-import random as _random
-
 class urandom:
     """Mock urandom module (MicroPython compatibility)."""
 
@@ -694,11 +1019,18 @@ class urandom:
 
 def reset_all():
     """Reset all mock state. Call before loading new robot code."""
-    Motor._instances.clear()
+    # Fresh containers rather than clear(): O(1) instead of walking old entries
+    Motor._instances = [None] * _PORT_SLOTS
+    Motor._instance_list = ()
+    Motor._dirty_ports = set()
     Controller._instance = None
     DriveTrain._instance = None
     Brain._instance = None
-    MotorGroup._instances.clear()
-    Pneumatic._instances.clear()
-    CallbackRegistry._motor_callbacks.clear()
-    CallbackRegistry._brain_callbacks.clear()
+    MotorGroup._instances = []
+    Pneumatic._instances = [None] * _PORT_SLOTS
+    Pneumatic._instance_list = ()
+    Pneumatic._dirty_ports = set()
+    CallbackRegistry._motor_callbacks = ()
+    CallbackRegistry._brain_callbacks = ()
+    with Scheduler._lock:
+        Scheduler._heap = []
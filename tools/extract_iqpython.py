@@ -12,13 +12,33 @@ import sys
 import os
 from pathlib import Path
 
+# orjson is optional; the stdlib parser is used when it isn't installed
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# ijson is optional; when present, textContent is streamed out of the file
+# instead of decoding the whole project
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 
 def extract_python_code(iqpython_path: str) -> str:
     """Extract the textContent (Python code) from an .iqpython file."""
-    with open(iqpython_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if ijson is not None:
+        code = ''
+        with open(iqpython_path, 'rb') as f:
+            # Stop at the first match rather than scanning the rest of the file
+            for code in ijson.items(f, 'textContent'):
+                break
+    else:
+        data = _loads(Path(iqpython_path).read_bytes())
+        code = data.get('textContent', '')
 
-    code = data.get('textContent', '')
     # Convert escaped newlines to actual newlines
     code = code.replace('\\n', '\n').replace('\\t', '\t')
     return code
@@ -26,8 +46,7 @@ def extract_python_code(iqpython_path: str) -> str:
 
 def extract_robot_config(iqpython_path: str) -> dict:
     """Extract the robotConfig from an .iqpython file."""
-    with open(iqpython_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = _loads(Path(iqpython_path).read_bytes())
     return data.get('robotConfig', [])
 
 